@@ -1,8 +1,13 @@
 import hashlib
+import hmac
+import secrets
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
-from fastapi import Depends, HTTPException, Security, status
+from cachetools import TTLCache
+from fastapi import HTTPException, Security, status
 from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
 import structlog
 
 from src.config import get_settings
@@ -14,11 +19,18 @@ api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-class AuthContext(BaseModel):
-    """Authentication context passed to route handlers."""
+@dataclass(slots=True, frozen=True)
+class AuthContext:
+    """
+    Authentication context passed to route handlers.
+    A plain dataclass - it's built internally from trusted data and never
+    serialized, so it doesn't need Pydantic validation. Frozen because the
+    auth cache hands the same instance to every request with that key.
+    """
     user_id: str
     auth_type: str  # "api_key" or "jwt"
-    scopes: list[str] = []
+    scopes: frozenset[str] = frozenset()  # frozenset for O(1) scope checks
+    expires_at: Optional[int] = None  # JWT "exp" claim (unix seconds), if any
 
 
 class AuthService:
@@ -36,22 +48,77 @@ class AuthService:
         # Hardcoded for demo - replace with Firestore lookup in production
         # The key is hashed so even if someone reads this code, they can't
         # reverse engineer the actual key (well, easily anyway)
-        self._demo_keys = {
-            self._hash_key("demo-api-key-12345"): {
+        # Stored as a list of (digest, data) pairs rather than a dict so lookups
+        # can scan every entry with a constant-time compare (see validate_api_key)
+        self._demo_keys: list[tuple[bytes, dict]] = [
+            (self._hash_key("demo-api-key-12345"), {
                 "user_id": "demo-user",
-                "scopes": ["documents:read", "documents:write"],
+                "scopes": frozenset({"documents:read", "documents:write"}),
                 "active": True
-            }
-        }
-
-    def _hash_key(self, key: str) -> str:
-        """Hash API key for secure comparison."""
-        return hashlib.sha256(key.encode()).hexdigest()
+            })
+        ]
+
+        # Short-lived cache of successful authentications so repeat requests
+        # skip hashing and AuthContext construction. Keys are keyed BLAKE2b
+        # digests of the credential, so raw keys/tokens never sit in memory
+        # and the per-process secret makes the cache keys useless elsewhere.
+        self._cache: TTLCache = TTLCache(
+            maxsize=self.settings.auth_cache_max_size,
+            ttl=self.settings.auth_cache_ttl
+        )
+        self._cache_secret = secrets.token_bytes(32)
+
+    def _hash_key(self, key: str) -> bytes:
+        """Hash API key for secure comparison (raw 32-byte digest)."""
+        return hashlib.sha256(key.encode()).digest()
+
+    def _cache_key(self, auth_type: str, credential: str) -> bytes:
+        """Derive the auth cache key for a credential."""
+        return hashlib.blake2b(
+            f"{auth_type}:{credential}".encode(),
+            digest_size=16,
+            key=self._cache_secret
+        ).digest()
+
+    def get_cached(self, cache_key: bytes) -> Optional[AuthContext]:
+        """Return a cached auth context, dropping it if the token has expired."""
+        auth_ctx = self._cache.get(cache_key)
+        if auth_ctx is not None and auth_ctx.expires_at is not None:
+            if auth_ctx.expires_at < time.time():
+                self._cache.pop(cache_key, None)
+                return None
+        return auth_ctx
+
+    async def authenticate_api_key(self, api_key: str) -> Optional[AuthContext]:
+        """Validate an API key, going through the auth cache."""
+        cache_key = self._cache_key("api_key", api_key)
+        auth_ctx = self.get_cached(cache_key)
+        if auth_ctx is None:
+            auth_ctx = await self.validate_api_key(api_key)
+            if auth_ctx:
+                self._cache[cache_key] = auth_ctx
+        return auth_ctx
+
+    async def authenticate_jwt(self, token: str) -> Optional[AuthContext]:
+        """Validate a bearer token, going through the auth cache."""
+        cache_key = self._cache_key("jwt", token)
+        auth_ctx = self.get_cached(cache_key)
+        if auth_ctx is None:
+            auth_ctx = await self.validate_jwt(token)
+            if auth_ctx:
+                self._cache[cache_key] = auth_ctx
+        return auth_ctx
 
     async def validate_api_key(self, api_key: str) -> Optional[AuthContext]:
         """Validate API key and return auth context."""
         key_hash = self._hash_key(api_key)
-        key_data = self._demo_keys.get(key_hash)
+
+        # Always compare against every stored key, no early return, so response
+        # time doesn't tell an attacker whether (or which) key came close
+        key_data = None
+        for stored_hash, data in self._demo_keys:
+            if hmac.compare_digest(key_hash, stored_hash):
+                key_data = data
 
         if not key_data or not key_data.get("active"):
             return None
@@ -61,7 +128,7 @@ class AuthService:
         return AuthContext(
             user_id=key_data["user_id"],
             auth_type="api_key",
-            scopes=key_data.get("scopes", [])
+            scopes=key_data.get("scopes", frozenset())
         )
 
     async def validate_jwt(self, token: str) -> Optional[AuthContext]:
@@ -71,12 +138,13 @@ class AuthService:
         """
         # For demo purposes, accept a simple token format
         # In production: decoded = firebase_admin.auth.verify_id_token(token)
+        # and pass expires_at=decoded["exp"] so cached contexts expire with the token
         if token.startswith("demo-token-"):
             user_id = token.replace("demo-token-", "")
             return AuthContext(
                 user_id=user_id,
                 auth_type="jwt",
-                scopes=["documents:read", "documents:write"]
+                scopes=frozenset({"documents:read", "documents:write"})
             )
         return None
 
@@ -85,23 +153,20 @@ class AuthService:
 auth_service = AuthService()
 
 
-async def get_current_user(
-    api_key: Optional[str] = Security(api_key_header),
-    bearer: Optional[HTTPAuthorizationCredentials] = Security(bearer_scheme)
+async def _authenticate(
+    api_key: Optional[str],
+    bearer: Optional[HTTPAuthorizationCredentials]
 ) -> AuthContext:
-    """
-    Dependency to authenticate requests.
-    Supports both API key and Bearer token authentication.
-    """
+    """Resolve credentials to an auth context or raise 401."""
     # Try API key first
     if api_key:
-        auth_ctx = await auth_service.validate_api_key(api_key)
+        auth_ctx = await auth_service.authenticate_api_key(api_key)
         if auth_ctx:
             return auth_ctx
 
     # Try Bearer token
     if bearer:
-        auth_ctx = await auth_service.validate_jwt(bearer.credentials)
+        auth_ctx = await auth_service.authenticate_jwt(bearer.credentials)
         if auth_ctx:
             return auth_ctx
 
@@ -115,12 +180,35 @@ async def get_current_user(
     )
 
 
+async def get_current_user(
+    api_key: Optional[str] = Security(api_key_header),
+    bearer: Optional[HTTPAuthorizationCredentials] = Security(bearer_scheme)
+) -> AuthContext:
+    """
+    Dependency to authenticate requests.
+    Supports both API key and Bearer token authentication.
+    """
+    return await _authenticate(api_key, bearer)
+
+
+@lru_cache(maxsize=32)
 def require_scope(required_scope: str):
     """
     Dependency factory to require specific scopes.
     Usage: Depends(require_scope("documents:write"))
+
+    Cached so every route asking for the same scope shares one dependency
+    function.
+
+    Authenticates and checks the scope in one dependency rather than
+    depending on get_current_user, so FastAPI has one less level of the
+    dependency graph to resolve on every request.
     """
-    async def check_scope(auth: AuthContext = Depends(get_current_user)) -> AuthContext:
+    async def check_scope(
+        api_key: Optional[str] = Security(api_key_header),
+        bearer: Optional[HTTPAuthorizationCredentials] = Security(bearer_scheme)
+    ) -> AuthContext:
+        auth = await _authenticate(api_key, bearer)
         if required_scope not in auth.scopes:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
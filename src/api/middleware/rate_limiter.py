@@ -1,73 +1,199 @@
+import hashlib
+import os
+import struct
+import tempfile
 import time
-from collections import defaultdict
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from collections.abc import Callable
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+from cachetools import LRUCache
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 import structlog
 
+try:
+    import fcntl
+except ImportError:  # Windows - shared memory counters aren't available there
+    fcntl = None
+
 logger = structlog.get_logger(__name__)
 
+# (window_index, previous_window_count, current_window_count)
+WindowState = tuple[int, int, int]
+
+
+class SharedMemoryBuckets:
+    """
+    Rate limit counters in a named shared memory block, so all worker
+    processes on a host enforce one limit instead of each keeping its own
+    (with N workers the in-memory table effectively allows N times the limit).
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+    Clients are hashed into a fixed number of slots. Clients that collide
+    share a counter, which can only make the limit stricter. Each slot is
+    guarded by a byte-range lock on a lock file, so workers only wait on
+    each other when they hit the same slot.
+    """
+
+    _SLOT = struct.Struct("=qII")
+
+    def __init__(self, name: str, slots: int = 65_536):
+        if fcntl is None:
+            raise RuntimeError("Shared memory rate limiting requires a POSIX platform")
+
+        self.slots = slots
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+
+        # The block has to outlive whichever worker happened to create it, so
+        # don't let Python's resource tracker unlink it when that worker exits
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+
+        lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def update(self, client_id: str, advance: Callable[[WindowState], tuple[WindowState, bool]]) -> bool:
+        """Atomically apply advance() to a client's counters and return its verdict."""
+        digest = hashlib.blake2b(client_id.encode(), digest_size=8).digest()
+        offset = int.from_bytes(digest, "little") % self.slots * self._SLOT.size
+
+        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, self._SLOT.size, offset)
+        try:
+            state, limited = advance(self._SLOT.unpack_from(self._shm.buf, offset))
+            self._SLOT.pack_into(self._shm.buf, offset, *state)
+        finally:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, self._SLOT.size, offset)
+        return limited
+
+    def close(self) -> None:
+        """Release this process's handles. The block itself stays for the other workers."""
+        os.close(self._lock_fd)
+        self._shm.close()
+
+
+class RateLimitMiddleware:
     """
     Simple in-memory rate limiter.
     For production, use Redis-based rate limiting.
+
+    Uses a sliding window counter: per client we only keep the count for the
+    current fixed window and the one before it, and weight the previous count
+    by how much of it still overlaps the sliding window. Constant time and
+    memory per client, no matter how high the limit is.
+
+    The client table is an LRU capped at max_clients, so rotating API keys or
+    X-Forwarded-For values can't grow it without bound. Evicting a client just
+    resets its counters, which is fine for a rate limiter.
+
+    Pass shared_memory_name to keep the counters in a SharedMemoryBuckets
+    block instead, when running several workers on one host.
+
+    Written as a plain ASGI middleware rather than a BaseHTTPMiddleware: it
+    only looks at the path and headers, so there's no need for the extra
+    task and memory streams BaseHTTPMiddleware wraps around every request.
     """
 
-    def __init__(self, app, requests_limit: int = 100, window_seconds: int = 60):
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_limit: int = 100,
+        window_seconds: int = 60,
+        max_clients: int = 100_000,
+        shared_memory_name: Optional[str] = None
+    ):
+        self.app = app
         self.requests_limit = requests_limit
         self.window_seconds = window_seconds
-        self.request_counts: dict[str, list[float]] = defaultdict(list)
+        # client_id -> WindowState, only when the counters aren't in shared memory
+        self.buckets: Optional[LRUCache] = None
+        self.shared_buckets: Optional[SharedMemoryBuckets] = None
+        if shared_memory_name:
+            self.shared_buckets = SharedMemoryBuckets(shared_memory_name)
+        else:
+            self.buckets = LRUCache(maxsize=max_clients)
+        self._skip_paths = frozenset({"/health", "/"})
 
-    def _get_client_id(self, request: Request) -> str:
+    def _get_client_id(self, scope: Scope) -> str:
         """Extract client identifier from request."""
+        # One pass over the raw ASGI headers (lowercased bytes)
+        api_key = forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                api_key = value
+            elif name == b"x-forwarded-for":
+                forwarded = value
+
         # Try to get API key or user ID from headers
-        api_key = request.headers.get("X-API-Key", "")
         if api_key:
-            return f"api_key:{api_key[:8]}"
+            return f"api_key:{api_key[:8].decode('latin-1')}"
 
         # Fallback to IP address
-        forwarded = request.headers.get("X-Forwarded-For")
         if forwarded:
-            return f"ip:{forwarded.split(',')[0].strip()}"
+            return f"ip:{forwarded.decode('latin-1').split(',')[0].strip()}"
 
-        client_host = request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        client_host = client[0] if client else "unknown"
         return f"ip:{client_host}"
 
     def _is_rate_limited(self, client_id: str) -> bool:
         """Check if client has exceeded rate limit."""
-        current_time = time.time()
-        window_start = current_time - self.window_seconds
+        current_time = time.monotonic()
+
+        def advance(stored: Optional[WindowState]) -> tuple[WindowState, bool]:
+            return self._advance_window(stored, current_time)
+
+        if self.shared_buckets is not None:
+            return self.shared_buckets.update(client_id, advance)
 
-        # Clean old requests
-        self.request_counts[client_id] = [
-            ts for ts in self.request_counts[client_id]
-            if ts > window_start
-        ]
+        state, limited = advance(self.buckets.get(client_id))
+        self.buckets[client_id] = state
+        return limited
 
-        # Check limit
-        if len(self.request_counts[client_id]) >= self.requests_limit:
-            return True
+    def _advance_window(
+        self,
+        stored: Optional[WindowState],
+        current_time: float
+    ) -> tuple[WindowState, bool]:
+        """Count one request against a client's window state; returns (new_state, limited)."""
+        window_index = int(current_time // self.window_seconds)
+
+        stored_index, previous, current = stored or (window_index, 0, 0)
+        if window_index == stored_index + 1:
+            # Rolled into the next window - current count becomes the previous one
+            previous, current = current, 0
+        elif window_index != stored_index:
+            # Client was idle for more than a full window
+            previous, current = 0, 0
+
+        # Portion of the previous window still covered by the sliding window
+        overlap = 1 - (current_time % self.window_seconds) / self.window_seconds
+        if previous * overlap + current >= self.requests_limit:
+            return (window_index, previous, current), True
 
         # Record this request
-        self.request_counts[client_id].append(current_time)
-        return False
+        return (window_index, previous, current + 1), False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next) -> Response:
         # Skip rate limiting for health checks
-        if request.url.path in ["/health", "/"]:
-            return await call_next(request)
+        if scope["path"] in self._skip_paths:
+            await self.app(scope, receive, send)
+            return
 
-        client_id = self._get_client_id(request)
+        client_id = self._get_client_id(scope)
 
         if self._is_rate_limited(client_id):
             logger.warning(
                 "rate_limit_exceeded",
                 client_id=client_id,
-                path=request.url.path
+                path=scope["path"]
             )
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "error": "Rate limit exceeded",
@@ -75,5 +201,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "code": "RATE_LIMIT_EXCEEDED"
                 }
             )
+            await response(scope, receive, send)
+            return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
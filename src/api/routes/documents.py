@@ -1,15 +1,20 @@
+import asyncio
+import tempfile
 import time
+import uuid
 import magic
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, Optional
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status, BackgroundTasks
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 import structlog
 
 from src.config import get_settings
 from src.api.middleware.auth import AuthContext, get_current_user, require_scope
 from src.models.schemas import (
     Document, DocumentStatus, DocumentUploadResponse,
-    DocumentListResponse, OriginalFile, ErrorResponse
+    DocumentListResponse, OriginalFile, ErrorResponse, ImageMetadata
 )
 from src.services.storage import get_storage_service
 from src.services.firestore import get_firestore_service
@@ -19,13 +24,88 @@ from src.services.pdf_processor import get_pdf_processor
 logger = structlog.get_logger(__name__)
 router = APIRouter()
 
+# Uploads are copied to the spool file in chunks instead of one read(). On
+# Cloud Run /tmp is in-memory, so the spooled copy still counts against RAM
+# while the request runs - the point is that nothing stays pinned once the
+# request returns and the spool file is deleted.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# libmagic only needs the first few KB to identify a file
+MIME_SNIFF_BYTES = 4096
+PDF_SIGNATURE = b"%PDF-"
 
-async def process_document_async(document_id: str, user_id: str, pdf_content: bytes):
+# Upload limits are read once at import. Settings come from the environment,
+# which can't change without restarting the worker anyway.
+_MAX_FILE_BYTES = get_settings().max_file_size_mb * 1024 * 1024
+_ALLOWED_MIME = frozenset(get_settings().allowed_mime_types)
+_STRICT_MIME_CHECK = get_settings().strict_mime_check
+
+# Documents coming back from Firestore are already Document instances, so the
+# list endpoint serializes them directly instead of rebuilding (and
+# revalidating) a DocumentListResponse around them
+_document_list_adapter = TypeAdapter(list[Document])
+
+# Shared libmagic handle so the rule database is loaded once per process, not
+# per upload. python-magic serializes calls on a handle with its own lock.
+_mime_detector: Optional[magic.Magic] = None
+
+
+def _get_mime_detector() -> magic.Magic:
+    """Get or create the shared libmagic handle."""
+    global _mime_detector
+    if _mime_detector is None:
+        _mime_detector = magic.Magic(mime=True)
+    return _mime_detector
+
+
+async def _spool_upload(file: UploadFile, destination: BinaryIO, max_size: int) -> tuple[int, bytes]:
+    """
+    Copy an upload to destination chunk by chunk.
+    Returns (size_bytes, head) where head is the first few KB for content
+    sniffing. Raises 413 as soon as the upload goes over max_size.
+    """
+    size_bytes = 0
+    head = b""
+
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size_bytes += len(chunk)
+        if size_bytes > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File size exceeds maximum allowed ({max_size // (1024 * 1024)}MB)"
+            )
+        if len(head) < MIME_SNIFF_BYTES:
+            head += chunk[:MIME_SNIFF_BYTES - len(head)]
+        destination.write(chunk)
+
+    destination.flush()
+    return size_bytes, head
+
+
+async def _attach_signed_urls(images: list[ImageMetadata]) -> None:
+    """Fill in signed_url on each image, signing all of them concurrently."""
+    storage = get_storage_service()
+    urls = await asyncio.gather(*[
+        storage.generate_signed_url(
+            gcs_path=image.gcs_path,
+            bucket_type="images",
+            expiration_minutes=60
+        )
+        for image in images
+    ])
+    for image, url in zip(images, urls, strict=True):
+        image.signed_url = url
+
+
+async def process_document_async(document_id: str, user_id: str, gcs_path: str):
     """
     Background task to process uploaded PDF.
 
     This runs after the upload endpoint returns, so the user doesn't have to wait.
     Typical processing time is 2-5 seconds depending on PDF size.
+
+    The PDF is handed over by its GCS path rather than as bytes, so the upload
+    isn't pinned in memory between the request finishing and processing
+    starting. Re-downloading from a same-region bucket is cheap.
     """
     # TODO: Consider moving this to Cloud Tasks for better reliability in production
     start_time = time.time()
@@ -33,30 +113,40 @@ async def process_document_async(document_id: str, user_id: str, pdf_content: by
     storage = get_storage_service()
     document_ai = get_document_ai_service()
     pdf_processor = get_pdf_processor()
+    log = logger.bind(document_id=document_id, user_id=user_id)
 
     try:
-        logger.info("starting_document_processing", document_id=document_id)
+        log.info("starting_document_processing")
 
         # Update status to processing
         await firestore.update_status(document_id, DocumentStatus.PROCESSING)
 
-        # Extract data with Document AI
-        extracted_data, confidence = await document_ai.process_document(pdf_content)
+        pdf_content = await storage.download_pdf(gcs_path)
+        if pdf_content is None:
+            raise FileNotFoundError(f"Uploaded PDF not found: {gcs_path}")
 
-        # Extract images from PDF
-        images = await pdf_processor.extract_images(pdf_content)
+        # Document AI extraction and image extraction don't depend on each
+        # other, so run them side by side
+        (extracted_data, confidence), images = await asyncio.gather(
+            document_ai.process_document(pdf_content),
+            pdf_processor.extract_images(pdf_content)
+        )
+        del pdf_content
 
-        # Upload extracted images to GCS
-        image_metadata_list = []
-        for image_bytes, metadata in images:
-            content_type = f"image/{metadata.format}"
-            gcs_path = await storage.upload_image(
+        # Upload extracted images to GCS concurrently
+        gcs_paths = await asyncio.gather(*[
+            storage.upload_image(
                 content=image_bytes,
                 user_id=user_id,
                 document_id=document_id,
                 image_id=metadata.id,
-                content_type=content_type
+                content_type=f"image/{metadata.format}"
             )
+            for image_bytes, metadata in images
+        ])
+
+        image_metadata_list = []
+        for (_, metadata), gcs_path in zip(images, gcs_paths, strict=True):
             metadata.gcs_path = gcs_path
             image_metadata_list.append(metadata)
 
@@ -66,24 +156,22 @@ async def process_document_async(document_id: str, user_id: str, pdf_content: by
         # Update document with extracted data
         await firestore.update_document(document_id, {
             "status": DocumentStatus.COMPLETED.value,
-            "extracted_data": extracted_data.model_dump(),
-            "images": [img.model_dump() for img in image_metadata_list],
+            "extracted_data": extracted_data.model_dump(exclude_none=True),
+            "images": [img.model_dump(exclude_none=True) for img in image_metadata_list],
             "confidence_score": confidence,
             "processing_time_ms": processing_time_ms,
             "processed_at": datetime.utcnow()
         })
 
-        logger.info(
+        log.info(
             "document_processing_completed",
-            document_id=document_id,
             images_count=len(image_metadata_list),
             processing_time_ms=processing_time_ms
         )
 
     except Exception as e:
-        logger.error(
+        log.error(
             "document_processing_failed",
-            document_id=document_id,
             error=str(e)
         )
         await firestore.update_status(
@@ -116,8 +204,6 @@ async def upload_document(
 
     **Authentication:** Requires valid API key or Bearer token with `documents:write` scope.
     """
-    settings = get_settings()
-
     # Validate file extension
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(
@@ -125,46 +211,52 @@ async def upload_document(
             detail="Only PDF files are accepted"
         )
 
-    # Read file content
-    content = await file.read()
-
-    # Validate file size
-    max_size = settings.max_file_size_mb * 1024 * 1024
-    if len(content) > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds maximum allowed ({settings.max_file_size_mb}MB)"
-        )
+    # Stream the upload to a temp file instead of reading it all into memory.
+    # It only lives for the duration of the request - the background task
+    # picks the PDF up from GCS.
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as spool:
+        size_bytes, head = await _spool_upload(file, spool, _MAX_FILE_BYTES)
+
+        # Validate magic bytes - every PDF starts with "%PDF-", so there's no
+        # need to run libmagic's whole rule set just to confirm that
+        if not head.startswith(PDF_SIGNATURE):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid file type. Only PDF files are accepted."
+            )
+        mime_type = "application/pdf"
+
+        # Optional second opinion from libmagic for defense in depth
+        if _STRICT_MIME_CHECK:
+            sniffed_type = _get_mime_detector().from_buffer(head)
+            if sniffed_type not in _ALLOWED_MIME:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid file type: {sniffed_type}. Only PDF files are accepted."
+                )
+
+        # Validate PDF structure
+        pdf_processor = get_pdf_processor()
+        is_valid, error_msg = await pdf_processor.validate_pdf(spool.name)
+        if not is_valid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error_msg
+            )
 
-    # Validate MIME type using magic bytes
-    mime_type = magic.from_buffer(content, mime=True)
-    if mime_type not in settings.allowed_mime_types:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type: {mime_type}. Only PDF files are accepted."
-        )
+        # Generate document ID and upload to GCS
+        document_id = uuid.uuid4().hex
 
-    # Validate PDF structure
-    pdf_processor = get_pdf_processor()
-    is_valid, error_msg = await pdf_processor.validate_pdf(content)
-    if not is_valid:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error_msg
+        storage = get_storage_service()
+        spool.seek(0)
+        gcs_path, checksum = await storage.upload_pdf(
+            file_obj=spool,
+            size_bytes=size_bytes,
+            user_id=auth.user_id,
+            document_id=document_id,
+            filename=file.filename
         )
 
-    # Generate document ID and upload to GCS
-    import uuid
-    document_id = str(uuid.uuid4())
-
-    storage = get_storage_service()
-    gcs_path, checksum = await storage.upload_pdf(
-        content=content,
-        user_id=auth.user_id,
-        document_id=document_id,
-        filename=file.filename
-    )
-
     # Create document record in Firestore
     document = Document(
         id=document_id,
@@ -173,7 +265,7 @@ async def upload_document(
         original_file=OriginalFile(
             gcs_path=gcs_path,
             filename=file.filename,
-            size_bytes=len(content),
+            size_bytes=size_bytes,
             mime_type=mime_type,
             checksum_sha256=checksum
         )
@@ -187,14 +279,14 @@ async def upload_document(
         process_document_async,
         document_id=document_id,
         user_id=auth.user_id,
-        pdf_content=content
+        gcs_path=gcs_path
     )
 
     logger.info(
         "document_upload_accepted",
         document_id=document_id,
         filename=file.filename,
-        size_bytes=len(content),
+        size_bytes=size_bytes,
         user_id=auth.user_id
     )
 
@@ -232,11 +324,11 @@ async def list_documents(
         cursor=cursor
     )
 
-    return DocumentListResponse(
-        documents=documents,
-        total_count=len(documents),
-        next_cursor=next_cursor
-    )
+    return ORJSONResponse(content={
+        "documents": _document_list_adapter.dump_python(documents, mode="json"),
+        "total_count": len(documents),
+        "next_cursor": next_cursor
+    })
 
 
 @router.get(
@@ -254,7 +346,8 @@ async def get_document(
     """
     Retrieve a specific document with extracted data and images.
 
-    Images are returned with signed URLs valid for 1 hour.
+    Images are returned with signed URLs valid for at least 30 minutes
+    (URLs are signed for 1 hour and reused for up to 30 minutes).
 
     **Authentication:** Requires valid API key or Bearer token with `documents:read` scope.
     """
@@ -276,13 +369,7 @@ async def get_document(
 
     # Generate signed URLs for images
     if document.images:
-        storage = get_storage_service()
-        for image in document.images:
-            image.signed_url = await storage.generate_signed_url(
-                gcs_path=image.gcs_path,
-                bucket_type="images",
-                expiration_minutes=60
-            )
+        await _attach_signed_urls(document.images)
 
     return document
 
@@ -322,21 +409,12 @@ async def get_document_images(
         return {"images": [], "document_id": document_id}
 
     # Generate signed URLs
-    storage = get_storage_service()
-    images_with_urls = []
-
-    for image in document.images:
-        image.signed_url = await storage.generate_signed_url(
-            gcs_path=image.gcs_path,
-            bucket_type="images",
-            expiration_minutes=60
-        )
-        images_with_urls.append(image)
+    await _attach_signed_urls(document.images)
 
     return {
         "document_id": document_id,
-        "images": images_with_urls,
-        "count": len(images_with_urls)
+        "images": document.images,
+        "count": len(document.images)
     }
 
 
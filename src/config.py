@@ -1,6 +1,7 @@
 from functools import lru_cache
+from typing import Literal
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, field_validator
 
 
 class Settings(BaseSettings):
@@ -23,19 +24,35 @@ class Settings(BaseSettings):
     api_host: str = Field(default="0.0.0.0", alias="API_HOST")
     api_port: int = Field(default=8080, alias="API_PORT")
     debug: bool = Field(default=False, alias="DEBUG")
+    # WARNING keeps the info-level request/upload logs quiet by default
+    log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = Field(
+        default="WARNING", alias="LOG_LEVEL"
+    )
 
     # Security
     api_key_header: str = Field(default="X-API-Key", alias="API_KEY_HEADER")
     jwt_algorithm: str = Field(default="RS256", alias="JWT_ALGORITHM")
     access_token_expire_minutes: int = Field(default=60, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
+    auth_cache_ttl: int = Field(default=30, alias="AUTH_CACHE_TTL")
+    auth_cache_max_size: int = Field(default=10_000, alias="AUTH_CACHE_MAX_SIZE")
 
     # Rate Limiting
     rate_limit_requests: int = Field(default=100, alias="RATE_LIMIT_REQUESTS")
     rate_limit_window: int = Field(default=60, alias="RATE_LIMIT_WINDOW")
+    rate_limit_max_clients: int = Field(default=100_000, alias="RATE_LIMIT_MAX_CLIENTS")
+    # Set to share counters between workers on one host (e.g. "vet-api-ratelimit")
+    rate_limit_shared_memory_name: str = Field(default="", alias="RATE_LIMIT_SHARED_MEMORY_NAME")
 
     # File Upload Limits
     max_file_size_mb: int = Field(default=50)
     allowed_mime_types: list[str] = Field(default=["application/pdf"])
+    strict_mime_check: bool = Field(default=False, alias="STRICT_MIME_CHECK")
+
+    @field_validator("log_level", mode="before")
+    @classmethod
+    def _upper_log_level(cls, value):
+        # LOG_LEVEL=info is common, so match the level names case-insensitively
+        return value.upper() if isinstance(value, str) else value
 
     class Config:
         env_file = ".env"
@@ -6,10 +6,13 @@ and we wire up all the routes and middleware here.
 
 Run locally with: uvicorn src.main:app --reload --port 8080
 """
+import logging
+import sys
 import structlog
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.api.routes import documents, health
 from src.api.middleware.rate_limiter import RateLimitMiddleware
@@ -17,17 +20,22 @@ from src.config import get_settings
 
 # Structured logging makes debugging in Cloud Run much easier
 # Each log line is JSON, so you can filter by fields in Cloud Logging
+log_level = logging.getLevelName(get_settings().log_level)
+logging.basicConfig(format="%(message)s", stream=sys.stdout, level=log_level)
+
+# The filtering bound logger drops calls below log_level before any processor
+# runs, so disabled debug/info calls cost next to nothing
 structlog.configure(
     processors=[
-        structlog.stdlib.filter_by_level,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.JSONRenderer()
     ],
-    wrapper_class=structlog.stdlib.BoundLogger,
+    wrapper_class=structlog.make_filtering_bound_logger(log_level),
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
+    cache_logger_on_first_use=True,
 )
 
 logger = structlog.get_logger(__name__)
@@ -57,6 +65,9 @@ def create_app() -> FastAPI:
         docs_url="/docs" if settings.debug else None,
         redoc_url="/redoc" if settings.debug else None,
         lifespan=lifespan,
+        # orjson encodes datetimes, enums and nested dicts in C - noticeably
+        # faster than stdlib json for document lists
+        default_response_class=ORJSONResponse,
     )
 
     # CORS - wide open for now, tighten this up before going to prod
@@ -73,7 +84,9 @@ def create_app() -> FastAPI:
     app.add_middleware(
         RateLimitMiddleware,
         requests_limit=settings.rate_limit_requests,
-        window_seconds=settings.rate_limit_window
+        window_seconds=settings.rate_limit_window,
+        max_clients=settings.rate_limit_max_clients,
+        shared_memory_name=settings.rate_limit_shared_memory_name or None
     )
 
     # Register routers
@@ -68,7 +68,7 @@ class Recommendation(BaseModel):
 
 class ImageMetadata(BaseModel):
     """Metadata for extracted ultrasound images."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     gcs_path: str
     page_number: Optional[int] = None
     width: Optional[int] = None
@@ -102,7 +102,7 @@ class OriginalFile(BaseModel):
 
 class Document(BaseModel):
     """Complete document record stored in Firestore."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     owner_id: str
     status: DocumentStatus = DocumentStatus.UPLOADING
     error_message: Optional[str] = None
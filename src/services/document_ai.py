@@ -13,6 +13,116 @@ from src.models.schemas import (
 logger = structlog.get_logger(__name__)
 
 
+def _compile_fields(
+    patterns: dict[str, list[str]]
+) -> tuple[tuple[str, tuple[re.Pattern, ...]], ...]:
+    """Compile {field: [pattern, ...]} into (field, (compiled, ...)) pairs."""
+    return tuple(
+        (field, tuple(re.compile(pattern) for pattern in field_patterns))
+        for field, field_patterns in patterns.items()
+    )
+
+
+def _lower(text: str) -> str:
+    """Lowercase text, keeping every character at the same index."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+
+    # A few characters (like "İ") lowercase to two code points, which would
+    # shift the match offsets we use to slice values out of the original
+    return "".join(char.lower()[0] for char in text)
+
+
+# All extraction patterns are compiled once at import. Calling re.search with
+# a pattern string goes through re's compile cache on every call.
+# Patterns support both Spanish and English field labels.
+#
+# They're written in lowercase and run against a lowered copy of the text
+# instead of using re.IGNORECASE, which case-folds every character compared.
+# Values are sliced out of the original text so they keep their case.
+#
+# Free-text values must start with a non-space character (so the separator and
+# the value can't both claim the same whitespace) and are capped in length.
+# Without that, a run of repeated labels like "Patient Patient ..." made every
+# occurrence rescan the rest of the document - quadratic on long reports.
+
+_PATIENT_PATTERNS = _compile_fields({
+    "name": [
+        r"(?:paciente|patient|nombre|name)[\s:]+([a-záéíóúñ][a-záéíóúñ\s]{0,79}?)(?:\n|,|;|\s{2,})",
+        r"(?:mascota|pet)[\s:]+([a-záéíóúñ][a-záéíóúñ\s]{0,79}?)(?:\n|,|;)"
+    ],
+    "species": [
+        r"(?:especie|species)[\s:]+([a-záéíóúñ][a-záéíóúñ\s]{0,79}?)(?:\n|,|;)",
+        r"\b(canino|felino|canine|feline|perro|gato|dog|cat)\b"
+    ],
+    "breed": [
+        r"(?:raza|breed)[\s:]+([a-záéíóúñ][a-záéíóúñ\s]{0,79}?)(?:\n|,|;)"
+    ],
+    "age": [
+        r"(?:edad|age)[\s:]+(\d+[\s]*(?:años?|years?|meses?|months?|a|m))",
+    ],
+    "weight": [
+        r"(?:peso|weight)[\s:]+(\d+(?:[\.,]\d*)?[\s]*(?:kg|lb|kilos?|pounds?))",
+    ],
+    "sex": [
+        r"(?:sexo|sex|género|gender)[\s:]+([a-záéíóúñ][a-záéíóúñ\s]{0,79}?)(?:\n|,|;)",
+        r"\b(macho|hembra|male|female|castrado|castrated|neutro|neutered)\b"
+    ]
+})
+
+_OWNER_PATTERNS = _compile_fields({
+    "name": [
+        r"(?:propietario|owner|dueño|tutor)[\s:]+([a-záéíóúñ][a-záéíóúñ\s]{0,79}?)(?:\n|,|;|\s{2,})",
+        r"(?:cliente|client)[\s:]+([a-záéíóúñ][a-záéíóúñ\s]{0,79}?)(?:\n|,|;)"
+    ],
+    "phone": [
+        r"(?:tel[eé]fono|phone|cel|móvil|mobile)[\s:]+([+\d\s\-\(\)]+)",
+    ],
+    "email": [
+        r"(?:email|correo|e-mail)[\s:]+([a-z0-9._%+-]{1,64}@[a-z0-9.-]{1,255}\.[a-z]{2,63})",
+        r"\b([a-z0-9._%+-]{1,64}@[a-z0-9.-]{1,255}\.[a-z]{2,63})\b"
+    ],
+    "address": [
+        r"(?:direcci[oó]n|address|domicilio)[\s:]+([a-z0-9áéíóúñ,#\.-][a-z0-9áéíóúñ\s,#\.-]{0,199}?)(?:\n|;)"
+    ]
+})
+
+_VETERINARIAN_PATTERNS = _compile_fields({
+    "name": [
+        r"(?:veterinario|veterinarian|m[eé]dico|doctor|dr\.?)[\s:]+([a-záéíóúñ\.][a-záéíóúñ\s\.]{0,79}?)(?:\n|,|;|\s{2,})",
+        r"(?:atendido por|examined by|revisado por)[\s:]+([a-záéíóúñ\.][a-záéíóúñ\s\.]{0,79}?)(?:\n|,|;)"
+    ],
+    "license_number": [
+        r"(?:c[eé]dula|license|matr[ií]cula|registro)[\s:#]+([a-z0-9\-]+)",
+    ],
+    "clinic_name": [
+        r"(?:cl[ií]nica|clinic|hospital|centro)[\s:]+([a-z0-9áéíóúñ\.&][a-z0-9áéíóúñ\s\.&]{0,99}?)(?:\n|,|;)"
+    ]
+})
+
+# Section patterns span multiple lines, hence DOTALL
+_DIAGNOSIS_SECTION = re.compile(
+    r"(?:diagn[oó]stico|diagnosis|hallazgos|findings|conclusi[oó]n|conclusion)[\s:]+(.+?)(?=(?:recomendaci|recommendation|tratamiento|treatment|medicaci|medication|\Z))",
+    re.DOTALL
+)
+_RECOMMENDATIONS_SECTION = re.compile(
+    r"(?:recomendaci[oó]n|recommendation|tratamiento|treatment|indicaci[oó]n|plan)[\s:]+(.+?)(?=(?:firma|signature|fecha|date|observaci|nota|\Z))",
+    re.DOTALL
+)
+
+# List items inside a section: bullet points, or numbered items as a fallback
+_BULLET_ITEM = re.compile(r"[-•●]\s*(.+?)(?:\n|$)")
+_NUMBERED_ITEM = re.compile(r"(?<!\d)\d+[\.)\-]\s*(.+?)(?:\n|$)")
+
+# Checked in order, first category with a keyword in the item wins
+_RECOMMENDATION_TYPES = (
+    ("medication", re.compile(r"medicamento|medication|mg|ml|tableta|tablet|dosis|dose")),
+    ("procedure", re.compile(r"cirug|surgery|operaci|biopsia|biopsy|radiograf|ecograf")),
+    ("followup", re.compile(r"control|seguimiento|follow|revisión|cita|appointment|días|semanas"))
+)
+
+
 class DocumentAIService:
     """
     Handles all the heavy lifting for PDF text extraction.
@@ -27,11 +137,14 @@ class DocumentAIService:
     def __init__(self):
         self.settings = get_settings()
 
-        # Configure client for the processor location
+        # Configure client for the processor location. The async client runs
+        # the RPC on grpc.aio, so a multi-second OCR call doesn't block the
+        # event loop. It binds to the running loop, which is why the singleton
+        # is only ever created from inside a request/background task.
         opts = ClientOptions(
             api_endpoint=f"{self.settings.documentai_location}-documentai.googleapis.com"
         )
-        self.client = documentai.DocumentProcessorServiceClient(client_options=opts)
+        self.client = documentai.DocumentProcessorServiceAsyncClient(client_options=opts)
 
         # Build processor name
         self.processor_name = self.client.processor_path(
@@ -59,7 +172,7 @@ class DocumentAIService:
         logger.info("processing_document_with_ai", processor=self.processor_name)
 
         # Process the document
-        result = self.client.process_document(request=request)
+        result = await self.client.process_document(request=request)
         document = result.document
 
         # Extract text and entities
@@ -79,36 +192,39 @@ class DocumentAIService:
 
     def _calculate_confidence(self, document) -> float:
         """Calculate average confidence score from document."""
-        confidences = []
+        # Running sum instead of building a list. Every block has a layout
+        # (proto fields are never missing, confidence just defaults to 0.0)
+        total = 0.0
+        count = 0
 
         for page in document.pages:
             for block in page.blocks:
-                if hasattr(block, 'layout') and hasattr(block.layout, 'confidence'):
-                    confidences.append(block.layout.confidence)
+                total += block.layout.confidence
+                count += 1
 
-        return sum(confidences) / len(confidences) if confidences else 0.0
+        return total / count if count else 0.0
 
     def _parse_extracted_text(self, text: str, document) -> ExtractedData:
         """
         Parse the extracted text into structured fields.
         Uses pattern matching and entity extraction.
         """
-        text_lower = text.lower()
+        text_lower = _lower(text)
 
         # Extract patient information
-        patient = self._extract_patient_info(text)
+        patient = self._extract_patient_info(text, text_lower)
 
         # Extract owner information
-        owner = self._extract_owner_info(text)
+        owner = self._extract_owner_info(text, text_lower)
 
         # Extract veterinarian information
-        veterinarian = self._extract_veterinarian_info(text)
+        veterinarian = self._extract_veterinarian_info(text, text_lower)
 
         # Extract diagnosis
-        diagnosis = self._extract_diagnosis_info(text)
+        diagnosis = self._extract_diagnosis_info(text, text_lower)
 
         # Extract recommendations
-        recommendations = self._extract_recommendations(text)
+        recommendations = self._extract_recommendations(text, text_lower)
 
         return ExtractedData(
             patient=patient,
@@ -118,152 +234,65 @@ class DocumentAIService:
             recommendations=recommendations
         )
 
-    def _extract_patient_info(self, text: str) -> PatientInfo:
-        """Extract patient (animal) information."""
-        patient = PatientInfo()
-
-        # Common patterns for veterinary reports
-        patterns = {
-            "name": [
-                r"(?:paciente|patient|nombre|name)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\n|,|;|\s{2,})",
-                r"(?:mascota|pet)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\n|,|;)"
-            ],
-            "species": [
-                r"(?:especie|species)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\n|,|;)",
-                r"\b(canino|felino|canine|feline|perro|gato|dog|cat)\b"
-            ],
-            "breed": [
-                r"(?:raza|breed)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\n|,|;)"
-            ],
-            "age": [
-                r"(?:edad|age)[\s:]+(\d+[\s]*(?:años?|years?|meses?|months?|a|m))",
-            ],
-            "weight": [
-                r"(?:peso|weight)[\s:]+(\d+[\.,]?\d*[\s]*(?:kg|lb|kilos?|pounds?))",
-            ],
-            "sex": [
-                r"(?:sexo|sex|género|gender)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\n|,|;)",
-                r"\b(macho|hembra|male|female|castrado|castrated|neutro|neutered)\b"
-            ]
-        }
-
-        for field, field_patterns in patterns.items():
-            for pattern in field_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
+    def _apply_patterns(self, target, field_patterns, text: str, text_lower: str):
+        """Set each field on target from the first pattern that matches text."""
+        for field, patterns in field_patterns:
+            for pattern in patterns:
+                match = pattern.search(text_lower)
                 if match:
-                    setattr(patient, field, match.group(1).strip())
+                    setattr(target, field, text[match.start(1):match.end(1)].strip())
                     break
 
-        return patient
+        return target
 
-    def _extract_owner_info(self, text: str) -> OwnerInfo:
-        """Extract pet owner information."""
-        owner = OwnerInfo()
-
-        patterns = {
-            "name": [
-                r"(?:propietario|owner|dueño|tutor)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\n|,|;|\s{2,})",
-                r"(?:cliente|client)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s]+?)(?:\n|,|;)"
-            ],
-            "phone": [
-                r"(?:tel[eé]fono|phone|cel|móvil|mobile)[\s:]+([+\d\s\-\(\)]+)",
-            ],
-            "email": [
-                r"(?:email|correo|e-mail)[\s:]+([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})",
-                r"\b([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})\b"
-            ],
-            "address": [
-                r"(?:direcci[oó]n|address|domicilio)[\s:]+([A-Za-z0-9áéíóúñÁÉÍÓÚÑ\s,#\.-]+?)(?:\n|;)"
-            ]
-        }
-
-        for field, field_patterns in patterns.items():
-            for pattern in field_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    setattr(owner, field, match.group(1).strip())
-                    break
+    def _extract_patient_info(self, text: str, text_lower: str) -> PatientInfo:
+        """Extract patient (animal) information."""
+        return self._apply_patterns(PatientInfo(), _PATIENT_PATTERNS, text, text_lower)
 
-        return owner
+    def _extract_owner_info(self, text: str, text_lower: str) -> OwnerInfo:
+        """Extract pet owner information."""
+        return self._apply_patterns(OwnerInfo(), _OWNER_PATTERNS, text, text_lower)
 
-    def _extract_veterinarian_info(self, text: str) -> VeterinarianInfo:
+    def _extract_veterinarian_info(self, text: str, text_lower: str) -> VeterinarianInfo:
         """Extract veterinarian information."""
-        vet = VeterinarianInfo()
-
-        patterns = {
-            "name": [
-                r"(?:veterinario|veterinarian|m[eé]dico|doctor|dr\.?)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s\.]+?)(?:\n|,|;|\s{2,})",
-                r"(?:atendido por|examined by|revisado por)[\s:]+([A-Za-záéíóúñÁÉÍÓÚÑ\s\.]+?)(?:\n|,|;)"
-            ],
-            "license_number": [
-                r"(?:c[eé]dula|license|matr[ií]cula|registro)[\s:#]+([A-Z0-9\-]+)",
-            ],
-            "clinic_name": [
-                r"(?:cl[ií]nica|clinic|hospital|centro)[\s:]+([A-Za-z0-9áéíóúñÁÉÍÓÚÑ\s\.&]+?)(?:\n|,|;)"
-            ]
-        }
-
-        for field, field_patterns in patterns.items():
-            for pattern in field_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    setattr(vet, field, match.group(1).strip())
-                    break
+        return self._apply_patterns(VeterinarianInfo(), _VETERINARIAN_PATTERNS, text, text_lower)
 
-        return vet
-
-    def _extract_diagnosis_info(self, text: str) -> DiagnosisInfo:
+    def _extract_diagnosis_info(self, text: str, text_lower: str) -> DiagnosisInfo:
         """Extract diagnostic information."""
         diagnosis = DiagnosisInfo()
 
         # Extract the diagnosis section
-        diagnosis_patterns = [
-            r"(?:diagn[oó]stico|diagnosis|hallazgos|findings|conclusi[oó]n|conclusion)[\s:]+(.+?)(?=(?:recomendaci|recommendation|tratamiento|treatment|medicaci|medication|\Z))",
-        ]
-
-        for pattern in diagnosis_patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-            if match:
-                diagnosis_text = match.group(1).strip()
-                diagnosis.raw_text = diagnosis_text
-
-                # Extract individual findings (bullet points or numbered items)
-                findings = re.findall(r"[-•●]\s*(.+?)(?:\n|$)", diagnosis_text)
-                if not findings:
-                    findings = re.findall(r"\d+[\.)\-]\s*(.+?)(?:\n|$)", diagnosis_text)
+        match = _DIAGNOSIS_SECTION.search(text_lower)
+        if match:
+            diagnosis_text = text[match.start(1):match.end(1)].strip()
+            diagnosis.raw_text = diagnosis_text
 
-                diagnosis.findings = [f.strip() for f in findings if f.strip()]
+            # Extract individual findings (bullet points or numbered items)
+            findings = _BULLET_ITEM.findall(diagnosis_text)
+            if not findings:
+                findings = _NUMBERED_ITEM.findall(diagnosis_text)
 
-                # First sentence as primary diagnosis
-                sentences = diagnosis_text.split(".")
-                if sentences:
-                    diagnosis.primary = sentences[0].strip()
+            diagnosis.findings = [f.strip() for f in findings if f.strip()]
 
-                break
+            # First sentence as primary diagnosis (partition stops at the
+            # first period instead of splitting the whole section)
+            diagnosis.primary = diagnosis_text.partition(".")[0].strip()
 
         return diagnosis
 
-    def _extract_recommendations(self, text: str) -> list[Recommendation]:
+    def _extract_recommendations(self, text: str, text_lower: str) -> list[Recommendation]:
         """Extract treatment recommendations."""
         recommendations = []
 
         # Find recommendations section
-        rec_patterns = [
-            r"(?:recomendaci[oó]n|recommendation|tratamiento|treatment|indicaci[oó]n|plan)[\s:]+(.+?)(?=(?:firma|signature|fecha|date|observaci|nota|\Z))",
-        ]
-
-        rec_text = ""
-        for pattern in rec_patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-            if match:
-                rec_text = match.group(1).strip()
-                break
+        match = _RECOMMENDATIONS_SECTION.search(text_lower)
+        rec_text = text[match.start(1):match.end(1)].strip() if match else ""
 
         if rec_text:
             # Extract individual recommendations
-            items = re.findall(r"[-•●]\s*(.+?)(?:\n|$)", rec_text)
+            items = _BULLET_ITEM.findall(rec_text)
             if not items:
-                items = re.findall(r"\d+[\.)\-]\s*(.+?)(?:\n|$)", rec_text)
+                items = _NUMBERED_ITEM.findall(rec_text)
             if not items:
                 # Split by newlines
                 items = [line.strip() for line in rec_text.split("\n") if line.strip()]
@@ -282,16 +311,9 @@ class DocumentAIService:
         """Classify recommendation type based on content."""
         text_lower = text.lower()
 
-        medication_keywords = ["medicamento", "medication", "mg", "ml", "tableta", "tablet", "dosis", "dose"]
-        procedure_keywords = ["cirug", "surgery", "operaci", "biopsia", "biopsy", "radiograf", "ecograf"]
-        followup_keywords = ["control", "seguimiento", "follow", "revisión", "cita", "appointment", "días", "semanas"]
-
-        if any(kw in text_lower for kw in medication_keywords):
-            return "medication"
-        elif any(kw in text_lower for kw in procedure_keywords):
-            return "procedure"
-        elif any(kw in text_lower for kw in followup_keywords):
-            return "followup"
+        for rec_type, keywords in _RECOMMENDATION_TYPES:
+            if keywords.search(text_lower):
+                return rec_type
 
         return "other"
 
@@ -1,5 +1,8 @@
+import base64
+import binascii
 from datetime import datetime
 from typing import Optional
+from google.api_core.exceptions import NotFound
 from google.cloud import firestore
 import structlog
 
@@ -9,6 +12,24 @@ from src.models.schemas import Document, DocumentStatus
 logger = structlog.get_logger(__name__)
 
 
+def _encode_cursor(document: Document) -> str:
+    """
+    Build a page cursor from the sort key of the last document on the page,
+    so the next page can start after it without reading that document again.
+    """
+    key = f"{document.created_at.isoformat()}|{document.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Optional[tuple[datetime, str]]:
+    """Turn a cursor back into (created_at, document_id), or None if it's malformed."""
+    try:
+        created_at, document_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), document_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
 class FirestoreService:
     """
     Firestore service for document metadata storage.
@@ -28,11 +49,11 @@ class FirestoreService:
     async def create_document(self, document: Document) -> Document:
         """Create a new document record."""
         doc_ref = self._doc_ref(document.id)
-        doc_data = document.model_dump(mode="json")
 
-        # Convert datetime to Firestore timestamp
-        doc_data["created_at"] = document.created_at
-        doc_data["updated_at"] = document.updated_at
+        # Python mode keeps datetimes as datetimes (stored as Firestore
+        # timestamps) and the str enum status encodes as its value. Unset
+        # fields are left out rather than stored as nulls.
+        doc_data = document.model_dump(exclude_none=True)
 
         doc_ref.set(doc_data)
 
@@ -59,8 +80,12 @@ class FirestoreService:
         self,
         document_id: str,
         updates: dict
-    ) -> Optional[Document]:
-        """Update document fields."""
+    ) -> None:
+        """
+        Update document fields.
+        Doesn't read the document back - nothing uses the result, and it's a
+        second round trip on every status change.
+        """
         doc_ref = self._doc_ref(document_id)
 
         # Add updated timestamp
@@ -74,14 +99,12 @@ class FirestoreService:
             fields=list(updates.keys())
         )
 
-        return await self.get_document(document_id)
-
     async def update_status(
         self,
         document_id: str,
         status: DocumentStatus,
         error_message: Optional[str] = None
-    ) -> Optional[Document]:
+    ) -> None:
         """Update document processing status."""
         updates = {"status": status.value}
 
@@ -91,7 +114,7 @@ class FirestoreService:
         if status == DocumentStatus.COMPLETED:
             updates["processed_at"] = datetime.utcnow()
 
-        return await self.update_document(document_id, updates)
+        await self.update_document(document_id, updates)
 
     async def list_documents(
         self,
@@ -108,16 +131,22 @@ class FirestoreService:
             self.client.collection(self.COLLECTION_DOCUMENTS)
             .where("owner_id", "==", owner_id)
             .order_by("created_at", direction=firestore.Query.DESCENDING)
+            # Tie-breaker so the cursor is unique. Composite indexes already end
+            # with __name__ in the direction of their last field, so this
+            # doesn't need a new index
+            .order_by("__name__", direction=firestore.Query.DESCENDING)
         )
 
         if status:
             query = query.where("status", "==", status.value)
 
         if cursor:
-            # Start after the cursor document
-            cursor_doc = self._doc_ref(cursor).get()
-            if cursor_doc.exists:
-                query = query.start_after(cursor_doc)
+            # Start after the last document of the previous page
+            cursor_key = _decode_cursor(cursor)
+            if cursor_key:
+                query = query.start_after(list(cursor_key))
+            else:
+                logger.warning("invalid_cursor", owner_id=owner_id)
 
         # Fetch one extra to determine if there are more results
         docs = query.limit(limit + 1).stream()
@@ -129,7 +158,7 @@ class FirestoreService:
                 documents.append(Document(**doc.to_dict()))
             else:
                 # There are more results
-                next_cursor = documents[-1].id if documents else None
+                next_cursor = _encode_cursor(documents[-1]) if documents else None
 
         return documents, next_cursor
 
@@ -137,11 +166,13 @@ class FirestoreService:
         """Delete a document record."""
         doc_ref = self._doc_ref(document_id)
 
-        if not doc_ref.get().exists:
+        # Delete with an exists precondition instead of reading first - a
+        # missing document fails the write rather than needing its own RPC
+        try:
+            doc_ref.delete(option=self.client.write_option(exists=True))
+        except NotFound:
             return False
 
-        doc_ref.delete()
-
         logger.info("document_deleted", document_id=document_id)
         return True
 
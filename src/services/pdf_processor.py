@@ -1,14 +1,17 @@
-import io
-import uuid
-from typing import Optional
+import asyncio
+import secrets
+from typing import Optional, Union
 import fitz  # PyMuPDF
-from PIL import Image
 import structlog
 
 from src.models.schemas import ImageMetadata
 
 logger = structlog.get_logger(__name__)
 
+# PDFs can be passed around either as raw bytes or as a path to a local file
+# (uploads are spooled to disk so they don't have to live in memory)
+PDFSource = Union[bytes, str]
+
 
 class PDFProcessor:
     """
@@ -20,17 +23,32 @@ class PDFProcessor:
         self.min_image_size = min_image_size  # Minimum width/height in pixels
         self.max_image_size_bytes = int(max_image_size_mb * 1024 * 1024)
 
-    async def extract_images(self, pdf_content: bytes) -> list[tuple[bytes, ImageMetadata]]:
+    def _open(self, pdf: PDFSource) -> fitz.Document:
+        """Open a PDF from bytes or a file path."""
+        if isinstance(pdf, str):
+            return fitz.open(pdf, filetype="pdf")
+        return fitz.open(stream=pdf, filetype="pdf")
+
+    async def extract_images(self, pdf: PDFSource) -> list[tuple[bytes, ImageMetadata]]:
         """
         Extract all images from a PDF document.
         Returns list of (image_bytes, metadata) tuples.
         """
+        # Decoding and re-encoding images is CPU work, so it runs off the event
+        # loop (and overlaps with the Document AI call in the processing task).
+        # It's one thread per document on purpose: PyMuPDF holds the GIL while
+        # it works and a document can't be shared between threads, so a pool
+        # over pages wouldn't go any faster.
+        return await asyncio.to_thread(self._extract_images, pdf)
+
+    def _extract_images(self, pdf: PDFSource) -> list[tuple[bytes, ImageMetadata]]:
+        """Blocking part of extract_images."""
         images = []
 
         try:
-            doc = fitz.open(stream=pdf_content, filetype="pdf")
+            doc = self._open(pdf)
 
-            for page_num in range(len(doc)):
+            for page_num in range(doc.page_count):
                 page = doc[page_num]
                 image_list = page.get_images(full=True)
 
@@ -51,9 +69,10 @@ class PDFProcessor:
 
                             # Compress if too large
                             if len(image_bytes) > self.max_image_size_bytes:
-                                image_bytes, img_ext = self._compress_image(image_bytes)
+                                image_bytes, img_ext = self._compress_image(doc, xref, image_bytes, img_ext)
 
-                            image_id = str(uuid.uuid4())
+                            # Same 32 hex chars as uuid4().hex, without building a UUID
+                            image_id = secrets.token_hex(16)
                             metadata = ImageMetadata(
                                 id=image_id,
                                 gcs_path="",  # Will be set after upload
@@ -91,55 +110,66 @@ class PDFProcessor:
         logger.info("images_extracted", count=len(images))
         return images
 
-    def _compress_image(self, image_bytes: bytes, quality: int = 85) -> tuple[bytes, str]:
-        """Compress image to reduce size while maintaining quality."""
+    def _compress_image(
+        self,
+        doc: fitz.Document,
+        xref: int,
+        image_bytes: bytes,
+        img_ext: str,
+        quality: int = 85
+    ) -> tuple[bytes, str]:
+        """
+        Compress image to reduce size while maintaining quality.
+        MuPDF decodes the image straight from the PDF and encodes the JPEG
+        itself, so there's no extra decode through PIL.
+        """
         try:
-            img = Image.open(io.BytesIO(image_bytes))
+            pix = fitz.Pixmap(doc, xref)
 
-            # Convert to RGB if necessary
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
+            # JPEG has no alpha, and CMYK/other colorspaces go to RGB
+            if pix.alpha:
+                pix = fitz.Pixmap(pix, 0)
+            if pix.n not in (1, 3):
+                pix = fitz.Pixmap(fitz.csRGB, pix)
 
             # Resize if very large
             max_dimension = 2000
-            if max(img.size) > max_dimension:
-                ratio = max_dimension / max(img.size)
-                new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+            if max(pix.width, pix.height) > max_dimension:
+                ratio = max_dimension / max(pix.width, pix.height)
+                pix = fitz.Pixmap(pix, pix.width * ratio, pix.height * ratio, None)
 
-            # Save as JPEG
-            output = io.BytesIO()
-            img.save(output, format="JPEG", quality=quality, optimize=True)
-            return output.getvalue(), "jpeg"
+            return pix.tobytes("jpeg", jpg_quality=quality), "jpeg"
 
         except Exception as e:
             logger.warning("image_compression_failed", error=str(e))
-            return image_bytes, "png"
+            return image_bytes, img_ext
 
-    async def get_page_count(self, pdf_content: bytes) -> int:
+    async def get_page_count(self, pdf: PDFSource) -> int:
         """Get the number of pages in a PDF."""
         try:
-            doc = fitz.open(stream=pdf_content, filetype="pdf")
-            count = len(doc)
+            doc = self._open(pdf)
+            count = doc.page_count
             doc.close()
             return count
         except Exception:
             return 0
 
-    async def validate_pdf(self, pdf_content: bytes) -> tuple[bool, Optional[str]]:
+    async def validate_pdf(self, pdf: PDFSource) -> tuple[bool, Optional[str]]:
         """
         Validate that the content is a valid PDF.
         Returns (is_valid, error_message).
         """
-        # Check magic bytes
-        if not pdf_content.startswith(b"%PDF"):
-            return False, "Invalid PDF: missing PDF header"
-
+        # No separate magic-bytes check: opening with filetype="pdf" fails on
+        # anything MuPDF can't parse as a PDF, and is_pdf covers the rest
         try:
-            doc = fitz.open(stream=pdf_content, filetype="pdf")
-            page_count = len(doc)
+            doc = self._open(pdf)
+            is_pdf = doc.is_pdf
+            page_count = doc.page_count
             doc.close()
 
+            if not is_pdf:
+                return False, "Invalid PDF: not a PDF document"
+
             if page_count == 0:
                 return False, "Invalid PDF: no pages found"
 
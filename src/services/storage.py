@@ -1,8 +1,12 @@
+import asyncio
 import hashlib
 from datetime import timedelta
-from typing import Optional
+from itertools import islice
+from typing import BinaryIO, Optional
+from cachetools import TTLCache
 from google.cloud import storage
 from google.cloud.exceptions import NotFound
+from requests.adapters import HTTPAdapter
 import structlog
 
 from src.config import get_settings
@@ -10,38 +14,100 @@ from src.config import get_settings
 logger = structlog.get_logger(__name__)
 
 
+class _HashingReader:
+    """
+    Read-only file wrapper that SHA-256 hashes the bytes as the GCS client
+    reads them, so the checksum comes out of the upload itself instead of a
+    separate pass over the file.
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self._hasher = hashlib.sha256()
+        self._hashed_up_to = raw.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        start = self._raw.tell()
+        data = self._raw.read(size)
+        # Resumable uploads seek back and re-send a chunk after a failed
+        # request - only hash bytes we haven't seen yet
+        already_hashed = max(self._hashed_up_to - start, 0)
+        if already_hashed < len(data):
+            self._hasher.update(memoryview(data)[already_hashed:])
+            self._hashed_up_to = start + len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
 class StorageService:
     """
     Google Cloud Storage service for managing PDFs and images.
     Handles uploads, downloads, and signed URL generation.
     """
 
+    # Signed URLs are reused for at most 30 minutes, and only URLs valid for at
+    # least twice that get cached - so a URL handed out always has at least
+    # half its lifetime (30 minutes for the usual 60) left on it
+    SIGNED_URL_CACHE_TTL = 30 * 60
+    SIGNED_URL_CACHE_SIZE = 50_000
+
+    # PDFs over 8MB go through a resumable upload, which otherwise reads the
+    # file in 100MB chunks - i.e. buffers the whole thing in memory
+    PDF_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+    # GCS accepts at most 100 calls in one batch request
+    DELETE_BATCH_SIZE = 100
+
+    # Blocking GCS calls run on asyncio's default thread pool (at most 32
+    # threads), and requests only keeps 10 connections per host by default -
+    # past that every parallel image upload opens a fresh TLS connection
+    HTTP_POOL_SIZE = 32
+
     def __init__(self):
         self.settings = get_settings()
         self.client = storage.Client(project=self.settings.gcp_project_id)
+
+        # Leave the session alone if mTLS set up its own adapter
+        http = self.client._http
+        if not http.is_mtls:
+            http.mount("https://", HTTPAdapter(
+                pool_connections=self.HTTP_POOL_SIZE,
+                pool_maxsize=self.HTTP_POOL_SIZE
+            ))
+
         self.uploads_bucket = self.client.bucket(self.settings.gcs_bucket_uploads)
         self.images_bucket = self.client.bucket(self.settings.gcs_bucket_images)
-
-    def _calculate_checksum(self, content: bytes) -> str:
-        """Calculate SHA-256 checksum of file content."""
-        return hashlib.sha256(content).hexdigest()
+        self._signed_url_cache: TTLCache = TTLCache(
+            maxsize=self.SIGNED_URL_CACHE_SIZE,
+            ttl=self.SIGNED_URL_CACHE_TTL
+        )
 
     async def upload_pdf(
         self,
-        content: bytes,
+        file_obj: BinaryIO,
+        size_bytes: int,
         user_id: str,
         document_id: str,
         filename: str
     ) -> tuple[str, str]:
         """
-        Upload PDF to Cloud Storage.
+        Upload PDF to Cloud Storage, streaming from file_obj.
+        The SHA-256 checksum is computed on the fly as the file is uploaded.
         Returns (gcs_path, checksum).
         """
         # Sanitize filename and build path
         safe_filename = filename.replace("/", "_").replace("\\", "_")
         gcs_path = f"{user_id}/{document_id}/{safe_filename}"
 
-        blob = self.uploads_bucket.blob(gcs_path)
+        blob = self.uploads_bucket.blob(gcs_path, chunk_size=self.PDF_UPLOAD_CHUNK_SIZE)
 
         # Set content type and metadata
         blob.content_type = "application/pdf"
@@ -51,14 +117,25 @@ class StorageService:
             "original_filename": filename
         }
 
-        # Upload with checksum validation
-        checksum = self._calculate_checksum(content)
-        blob.upload_from_string(content, content_type="application/pdf")
+        # SHA-256 is what we store on the document (hashlib goes through
+        # OpenSSL, which uses the CPU's SHA extensions). Integrity in transit
+        # is a separate thing: checksum="crc32c" has the client send a CRC32C
+        # (native google-crc32c) that GCS checks server-side before it
+        # accepts the object.
+        reader = _HashingReader(file_obj)
+        await asyncio.to_thread(
+            blob.upload_from_file,
+            reader,
+            size=size_bytes,
+            content_type="application/pdf",
+            checksum="crc32c"
+        )
+        checksum = reader.hexdigest()
 
         logger.info(
             "pdf_uploaded",
             gcs_path=gcs_path,
-            size_bytes=len(content),
+            size_bytes=size_bytes,
             checksum=checksum[:16]
         )
 
@@ -86,7 +163,9 @@ class StorageService:
             "image_id": image_id
         }
 
-        blob.upload_from_string(content, content_type=content_type)
+        # The GCS client is blocking - run it in a thread so several images
+        # can upload at once without stalling the event loop
+        await asyncio.to_thread(blob.upload_from_string, content, content_type=content_type)
 
         logger.info(
             "image_uploaded",
@@ -100,7 +179,10 @@ class StorageService:
         """Download PDF from Cloud Storage."""
         try:
             blob = self.uploads_bucket.blob(gcs_path)
-            return blob.download_as_bytes()
+            # The download is verified against the object's hash either way.
+            # CRC32C (SSE4.2 via google-crc32c) is far cheaper than the
+            # default MD5 on a 50MB scan, and every object has one
+            return await asyncio.to_thread(blob.download_as_bytes, checksum="crc32c")
         except NotFound:
             logger.warning("pdf_not_found", gcs_path=gcs_path)
             return None
@@ -113,33 +195,59 @@ class StorageService:
     ) -> str:
         """
         Generate a signed URL for secure, time-limited access.
+        URLs valid for at least twice the cache TTL are cached, so repeat GETs
+        of the same document don't re-sign every image.
         """
+        cacheable = expiration_minutes * 60 >= 2 * self.SIGNED_URL_CACHE_TTL
+        if cacheable:
+            cache_key = hashlib.blake2b(
+                f"{bucket_type}:{expiration_minutes}:{gcs_path}".encode(),
+                digest_size=16
+            ).digest()
+            cached_url = self._signed_url_cache.get(cache_key)
+            if cached_url:
+                return cached_url
+
         bucket = self.images_bucket if bucket_type == "images" else self.uploads_bucket
         blob = bucket.blob(gcs_path)
 
-        url = blob.generate_signed_url(
+        # Signing is blocking (and a network call when it goes through the
+        # IAM signBlob API on Cloud Run), so keep it off the event loop
+        url = await asyncio.to_thread(
+            blob.generate_signed_url,
             version="v4",
             expiration=timedelta(minutes=expiration_minutes),
             method="GET"
         )
 
+        if cacheable:
+            self._signed_url_cache[cache_key] = url
+
         return url
 
     async def delete_document_files(self, user_id: str, document_id: str) -> None:
         """Delete all files associated with a document."""
         prefix = f"{user_id}/{document_id}/"
 
-        # Delete from uploads bucket
-        blobs = self.uploads_bucket.list_blobs(prefix=prefix)
-        for blob in blobs:
-            blob.delete()
-            logger.info("file_deleted", bucket="uploads", path=blob.name)
-
-        # Delete from images bucket
-        blobs = self.images_bucket.list_blobs(prefix=prefix)
-        for blob in blobs:
-            blob.delete()
-            logger.info("file_deleted", bucket="images", path=blob.name)
+        # Both buckets in parallel (batches are tracked per thread, so the
+        # two don't mix their deletes)
+        await asyncio.gather(
+            asyncio.to_thread(self._delete_prefix, self.uploads_bucket, "uploads", prefix),
+            asyncio.to_thread(self._delete_prefix, self.images_bucket, "images", prefix)
+        )
+
+    def _delete_prefix(self, bucket: storage.Bucket, bucket_name: str, prefix: str) -> None:
+        """Delete every blob under prefix, one batch request per DELETE_BATCH_SIZE blobs."""
+        blobs = iter(bucket.list_blobs(prefix=prefix))
+
+        while chunk := list(islice(blobs, self.DELETE_BATCH_SIZE)):
+            # Deletes inside the batch are queued and sent as one request on exit
+            with self.client.batch():
+                for blob in chunk:
+                    blob.delete()
+
+            for blob in chunk:
+                logger.info("file_deleted", bucket=bucket_name, path=blob.name)
 
 
 # Singleton instance
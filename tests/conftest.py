@@ -1,21 +1,39 @@
+import os
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
+from pytest_asyncio import is_async_test
 
+# Set test environment variables before anything imports the app or settings
+os.environ.setdefault("GCP_PROJECT_ID", "test-project")
+os.environ.setdefault("DOCUMENTAI_PROCESSOR_ID", "test-processor")
 
-@pytest.fixture
-def test_client():
-    """Create a test client for the FastAPI application."""
-    # Set test environment variables before importing app
-    import os
-    os.environ.setdefault("GCP_PROJECT_ID", "test-project")
-    os.environ.setdefault("DOCUMENTAI_PROCESSOR_ID", "test-processor")
 
+def pytest_collection_modifyitems(items):
+    """Run every async test on the session event loop the client lives on."""
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def test_client():
+    """
+    Create an async test client that calls the FastAPI app in-process.
+    Built once per run - the app and its lifespan are shared by every test.
+    """
     from src.main import app
-    with TestClient(app) as client:
-        yield client
+    # Runs the app on the tests' event loop, so there's no TestClient
+    # thread and portal hop per request
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def auth_headers():
     """Return headers with demo API key for authenticated requests."""
     return {"X-API-Key": "demo-api-key-12345"}
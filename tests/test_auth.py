@@ -1,32 +1,52 @@
 import pytest
 
 
-def test_unauthenticated_request_rejected(test_client):
+async def test_unauthenticated_request_rejected(test_client):
     """Test that requests without auth are rejected."""
-    response = test_client.get("/api/v1/documents")
+    response = await test_client.get("/api/v1/documents")
     assert response.status_code == 401
 
 
-def test_invalid_api_key_rejected(test_client):
+async def test_invalid_api_key_rejected(test_client):
     """Test that invalid API keys are rejected."""
-    response = test_client.get(
+    response = await test_client.get(
         "/api/v1/documents",
         headers={"X-API-Key": "invalid-key-12345"}
     )
     assert response.status_code == 401
 
 
-def test_valid_api_key_accepted(test_client, auth_headers):
+async def test_valid_api_key_accepted(test_client, auth_headers):
     """Test that valid API keys are accepted."""
-    response = test_client.get("/api/v1/documents", headers=auth_headers)
+    response = await test_client.get("/api/v1/documents", headers=auth_headers)
     # Should return 200 (empty list) not 401
     assert response.status_code == 200
 
 
-def test_bearer_token_format(test_client):
+async def test_bearer_token_format(test_client):
     """Test Bearer token authentication."""
-    response = test_client.get(
+    response = await test_client.get(
         "/api/v1/documents",
         headers={"Authorization": "Bearer demo-token-testuser"}
     )
     assert response.status_code == 200
+
+
+async def test_successful_auth_is_cached():
+    """Test that repeat requests with the same key reuse the cached context."""
+    from src.api.middleware.auth import auth_service
+
+    first = await auth_service.authenticate_api_key("demo-api-key-12345")
+    second = await auth_service.authenticate_api_key("demo-api-key-12345")
+    assert first is not None
+    assert second is first
+
+    assert await auth_service.authenticate_api_key("invalid-key-12345") is None
+
+
+def test_require_scope_reuses_dependency():
+    """Test that the same scope always maps to the same dependency."""
+    from src.api.middleware.auth import require_scope
+
+    assert require_scope("documents:read") is require_scope("documents:read")
+    assert require_scope("documents:read") is not require_scope("documents:write")
@@ -0,0 +1,23 @@
+import pytest
+from pydantic import ValidationError
+
+from src.config import Settings
+
+
+def test_log_level_defaults_to_warning(monkeypatch):
+    """Test that info logs stay off unless LOG_LEVEL asks for them."""
+    monkeypatch.delenv("LOG_LEVEL", raising=False)
+    assert Settings(_env_file=None).log_level == "WARNING"
+
+
+@pytest.mark.parametrize("level", ["info", "Debug", "WARNING"])
+def test_log_level_is_case_insensitive(level):
+    """Test that LOG_LEVEL=info works the same as LOG_LEVEL=INFO."""
+    assert Settings(LOG_LEVEL=level).log_level == level.upper()
+
+
+@pytest.mark.parametrize("level", ["verbose", "25"])
+def test_invalid_log_level_rejected(level):
+    """Test that an unknown LOG_LEVEL fails validation instead of at logging setup."""
+    with pytest.raises(ValidationError):
+        Settings(LOG_LEVEL=level)
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+from google.cloud import documentai_v1 as documentai
+
+from src.services.document_ai import DocumentAIService
+
+
+@pytest.fixture
+def parser():
+    # The text parsing doesn't touch the Document AI client, so skip __init__
+    # (it would need GCP credentials)
+    return DocumentAIService.__new__(DocumentAIService)
+
+
+def test_calculate_confidence(parser):
+    """Test that confidence is the mean over every block on every page."""
+    def block(confidence):
+        return documentai.Document.Page.Block(
+            layout=documentai.Document.Page.Layout(confidence=confidence)
+        )
+
+    document = documentai.Document(pages=[
+        documentai.Document.Page(blocks=[block(0.5), block(1.0)]),
+        documentai.Document.Page(blocks=[block(0.75)])
+    ])
+
+    assert parser._calculate_confidence(document) == pytest.approx(0.75)
+    assert parser._calculate_confidence(documentai.Document()) == 0.0
+
+
+def test_parse_extracted_text_fields(parser):
+    """Test the basic field extraction on a short report."""
+    text = (
+        "Paciente: Max\n"
+        "Especie: Canino\n"
+        "Peso: 32 kg\n"
+        "Propietario: Juan García\n"
+        "Email: juan@email.com\n"
+        "Veterinario: Dra. María López\n"
+    )
+
+    data = parser._parse_extracted_text(text, None)
+
+    assert data.patient.name == "Max"
+    assert data.patient.species == "Canino"
+    assert data.patient.weight == "32 kg"
+    assert data.owner.name == "Juan García"
+    assert data.owner.email == "juan@email.com"
+    assert data.veterinarian.name == "Dra. María López"
+
+
+def test_parse_extracted_text_keeps_original_case(parser):
+    """Test that values come from the original text, not the lowered copy."""
+    text = "İ PACIENTE: MAX\nOWNER: ANA PÉREZ\nPlan:\n- Biopsia hepática\n"
+
+    data = parser._parse_extracted_text(text, None)
+
+    assert data.patient.name == "MAX"
+    assert data.owner.name == "ANA PÉREZ"
+    assert data.recommendations[0].description == "Biopsia hepática"
+    assert data.recommendations[0].type == "procedure"
+
+
+@pytest.mark.parametrize("text", [
+    "Patient " * 10000 + "1",
+    "Dr " * 10000 + "1",
+    "Address " * 10000 + "€",
+    "Peso " + "1" * 10000,
+    "Diagnosis: " + "1" * 30000 + "x",
+    "a." * 10000 + "@"
+], ids=["labels", "dr-labels", "address-labels", "weight", "numbered", "email"])
+def test_parse_extracted_text_adversarial_input(parser, text):
+    """Test that pathological input doesn't make the regexes backtrack forever."""
+    start = time.perf_counter()
+    parser._parse_extracted_text(text, None)
+
+    # These took seconds each with the old patterns; linear ones take ms
+    assert time.perf_counter() - start < 1.0
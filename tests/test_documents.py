@@ -1,32 +1,33 @@
-import pytest
+import asyncio
 from io import BytesIO
 
+import pytest
+from fastapi import HTTPException, UploadFile
 
-def test_upload_requires_pdf(test_client, auth_headers):
-    """Test that only PDF files are accepted."""
-    # Try uploading a text file
-    response = test_client.post(
-        "/api/v1/documents",
-        headers=auth_headers,
-        files={"file": ("test.txt", b"not a pdf", "text/plain")}
-    )
-    assert response.status_code == 400
-    assert "PDF" in response.json()["detail"]
+from src.api.routes import documents
 
+# Upload payloads, built once (httpx only reads the files dict)
+NON_PDF_TXT = {"file": ("test.txt", b"not a pdf", "text/plain")}
+NON_PDF_DOC = {"file": ("test.doc", b"content", "application/msword")}
 
-def test_upload_validates_extension(test_client, auth_headers):
-    """Test that file extension is validated."""
-    response = test_client.post(
+
+@pytest.mark.parametrize("files", [NON_PDF_TXT, NON_PDF_DOC], ids=["txt", "doc"])
+async def test_upload_rejects_non_pdf(test_client, auth_headers, files):
+    """Test that only PDF files are accepted."""
+    response = await test_client.post(
         "/api/v1/documents",
         headers=auth_headers,
-        files={"file": ("test.doc", b"content", "application/msword")}
+        files=files
     )
     assert response.status_code == 400
 
+    data = response.json()
+    assert "PDF" in data["detail"]
+
 
-def test_list_documents_empty(test_client, auth_headers):
+async def test_list_documents_empty(test_client, auth_headers):
     """Test listing documents returns empty list for new user."""
-    response = test_client.get("/api/v1/documents", headers=auth_headers)
+    response = await test_client.get("/api/v1/documents", headers=auth_headers)
     assert response.status_code == 200
 
     data = response.json()
@@ -34,19 +35,64 @@ def test_list_documents_empty(test_client, auth_headers):
     assert isinstance(data["documents"], list)
 
 
-def test_get_nonexistent_document(test_client, auth_headers):
-    """Test getting a document that doesn't exist."""
-    response = test_client.get(
-        "/api/v1/documents/nonexistent-id",
-        headers=auth_headers
+async def test_nonexistent_document_404s(test_client, auth_headers):
+    """Test getting and deleting a document that doesn't exist."""
+    get_response, delete_response = await asyncio.gather(
+        test_client.get("/api/v1/documents/nonexistent-id", headers=auth_headers),
+        test_client.delete("/api/v1/documents/nonexistent-id", headers=auth_headers)
+    )
+    assert get_response.status_code == 404
+    assert delete_response.status_code == 404
+
+
+async def test_upload_rejects_non_pdf_content(test_client, auth_headers):
+    """Test that a .pdf name doesn't get non-PDF content past validation."""
+    response = await test_client.post(
+        "/api/v1/documents",
+        headers=auth_headers,
+        files={"file": ("report.pdf", b"just some text, not a pdf", "application/pdf")}
+    )
+    assert response.status_code == 400
+
+
+async def test_spool_upload_copies_file_and_caps_head(monkeypatch):
+    """Test that the head stays at MIME_SNIFF_BYTES when it spans several chunks."""
+    # Chunks smaller than the sniff size, so the head is built across boundaries
+    monkeypatch.setattr(documents, "UPLOAD_CHUNK_SIZE", 1000)
+    content = bytes(range(256)) * 40  # 10240 bytes, 11 chunks
+    destination = BytesIO()
+
+    size_bytes, head = await documents._spool_upload(
+        UploadFile(BytesIO(content)), destination, max_size=len(content)
     )
-    assert response.status_code == 404
 
+    assert size_bytes == len(content)
+    assert destination.getvalue() == content
+    assert head == content[:documents.MIME_SNIFF_BYTES]
 
-def test_delete_nonexistent_document(test_client, auth_headers):
-    """Test deleting a document that doesn't exist."""
-    response = test_client.delete(
-        "/api/v1/documents/nonexistent-id",
-        headers=auth_headers
+
+async def test_spool_upload_rejects_oversized_file_early(monkeypatch):
+    """Test that the upload stops with a 413 as soon as it passes max_size."""
+    monkeypatch.setattr(documents, "UPLOAD_CHUNK_SIZE", 1000)
+    destination = BytesIO()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await documents._spool_upload(
+            UploadFile(BytesIO(b"x" * 10_000)), destination, max_size=2500
+        )
+
+    assert exc_info.value.status_code == 413
+    # The chunk that crossed the limit (and everything after it) is never written
+    assert len(destination.getvalue()) == 2000
+
+
+async def test_spool_upload_empty_file():
+    """Test that an empty upload spools nothing."""
+    destination = BytesIO()
+
+    size_bytes, head = await documents._spool_upload(
+        UploadFile(BytesIO(b"")), destination, max_size=1024
     )
-    assert response.status_code == 404
+
+    assert (size_bytes, head) == (0, b"")
+    assert destination.getvalue() == b""
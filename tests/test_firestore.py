@@ -0,0 +1,20 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from src.models.schemas import Document
+from src.services.firestore import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trip():
+    """Test that a page cursor decodes back to the document's sort key."""
+    created_at = datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=UTC)
+    document = Document(owner_id="test-user", created_at=created_at)
+
+    assert _decode_cursor(_encode_cursor(document)) == (created_at, document.id)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm8tc2VwYXJhdG9y", "YmFkLWRhdGV8YWJj"])
+def test_malformed_cursor_is_ignored(cursor):
+    """Test that garbage cursors decode to None instead of raising."""
+    assert _decode_cursor(cursor) is None
@@ -1,6 +1,6 @@
-def test_health_endpoint(test_client):
+async def test_health_endpoint(test_client):
     """Test health check endpoint returns 200."""
-    response = test_client.get("/health")
+    response = await test_client.get("/health")
     assert response.status_code == 200
 
     data = response.json()
@@ -9,9 +9,9 @@ def test_health_endpoint(test_client):
     assert "timestamp" in data
 
 
-def test_root_endpoint(test_client):
+async def test_root_endpoint(test_client):
     """Test root endpoint returns API info."""
-    response = test_client.get("/")
+    response = await test_client.get("/")
     assert response.status_code == 200
 
     data = response.json()
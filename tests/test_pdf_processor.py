@@ -0,0 +1,53 @@
+import os
+
+import fitz
+import pytest
+
+from src.services.pdf_processor import PDFProcessor
+
+
+def make_pdf_with_image(colorspace, width: int, height: int) -> bytes:
+    """Build a one-page PDF holding a single noise image (noise doesn't compress)."""
+    pix = fitz.Pixmap(colorspace, width, height, os.urandom(width * height * colorspace.n), False)
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(page.rect, pixmap=pix)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+@pytest.mark.parametrize("colorspace", [fitz.csRGB, fitz.csCMYK], ids=["rgb", "cmyk"])
+async def test_extract_images_compresses_large_images(colorspace):
+    """Test that oversized images are downscaled and re-encoded as JPEG."""
+    processor = PDFProcessor(max_image_size_mb=0.1)
+    pdf_content = make_pdf_with_image(colorspace, 2500, 200)
+
+    images = await processor.extract_images(pdf_content)
+
+    assert len(images) == 1
+    image_bytes, metadata = images[0]
+    assert metadata.format == "jpeg"
+    assert image_bytes[:3] == b"\xff\xd8\xff"
+
+    pix = fitz.Pixmap(image_bytes)
+    assert (pix.width, pix.height) == (2000, 160)
+    assert pix.n == 3
+
+
+async def test_validate_pdf(sample_pdf_content):
+    """Test that a well-formed PDF passes validation."""
+    processor = PDFProcessor()
+
+    assert await processor.validate_pdf(sample_pdf_content) == (True, None)
+
+
+async def test_validate_pdf_rejects_non_pdf():
+    """Test that content MuPDF can't open as a PDF is rejected."""
+    processor = PDFProcessor()
+
+    is_valid, error_msg = await processor.validate_pdf(b"This is not a PDF file")
+
+    assert not is_valid
+    assert error_msg.startswith("Invalid PDF")
@@ -0,0 +1,119 @@
+import pytest
+
+from src.api.middleware import rate_limiter
+from src.api.middleware.rate_limiter import RateLimitMiddleware
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable replacement for time.monotonic inside the rate limiter."""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_requests_over_limit_are_rejected(clock):
+    """Test that a client is limited once it uses up its window."""
+    limiter = RateLimitMiddleware(app=None, requests_limit=3, window_seconds=60)
+
+    assert [limiter._is_rate_limited("ip:1.2.3.4") for _ in range(4)] == [False, False, False, True]
+    # Other clients are tracked separately
+    assert limiter._is_rate_limited("ip:5.6.7.8") is False
+
+
+def test_previous_window_is_weighted_by_overlap(clock):
+    """Test that requests from the previous window count proportionally."""
+    limiter = RateLimitMiddleware(app=None, requests_limit=4, window_seconds=60)
+
+    clock[0] = 1019.0  # last second of the [960, 1020) window
+    for _ in range(4):
+        assert limiter._is_rate_limited("client") is False
+
+    # Halfway through the next window, half of the old requests still count
+    clock[0] = 1050.0
+    assert limiter._is_rate_limited("client") is False
+    assert limiter._is_rate_limited("client") is False
+    assert limiter._is_rate_limited("client") is True
+
+    # Two full windows later the client starts fresh
+    clock[0] = 1200.0
+    assert limiter._is_rate_limited("client") is False
+
+
+def test_client_table_is_bounded(clock):
+    """Test that the least recently seen clients are evicted past max_clients."""
+    limiter = RateLimitMiddleware(app=None, requests_limit=5, window_seconds=60, max_clients=2)
+
+    for client_id in ("ip:1", "ip:2", "ip:3"):
+        limiter._is_rate_limited(client_id)
+
+    assert len(limiter.buckets) == 2
+    assert "ip:1" not in limiter.buckets
+
+
+def test_client_id_prefers_api_key_then_forwarded_ip():
+    """Test client identification from request headers."""
+    def make_scope(headers):
+        return {
+            "type": "http",
+            "path": "/api/v1/documents",
+            "headers": headers,
+            "client": ("10.0.0.1", 1234),
+        }
+
+    limiter = RateLimitMiddleware(app=None)
+    assert limiter._get_client_id(make_scope([
+        (b"x-forwarded-for", b"1.2.3.4, 10.0.0.2"),
+        (b"x-api-key", b"demo-api-key-12345"),
+    ])) == "api_key:demo-api"
+    assert limiter._get_client_id(make_scope([
+        (b"x-forwarded-for", b"1.2.3.4, 10.0.0.2"),
+    ])) == "ip:1.2.3.4"
+    assert limiter._get_client_id(make_scope([])) == "ip:10.0.0.1"
+
+
+def test_limited_requests_get_429_and_health_checks_pass():
+    """Test the middleware end to end on a bare ASGI app."""
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+    from starlette.testclient import TestClient
+
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/health", ok), Route("/api", ok)])
+    app.add_middleware(RateLimitMiddleware, requests_limit=1, window_seconds=60)
+    client = TestClient(app)
+
+    assert client.get("/api").status_code == 200
+    response = client.get("/api")
+    assert response.status_code == 429
+
+    data = response.json()
+    assert data["code"] == "RATE_LIMIT_EXCEEDED"
+    assert client.get("/health").status_code == 200
+
+
+def test_shared_memory_counters_are_shared_between_limiters(clock, monkeypatch, tmp_path):
+    """Test that limiters attached to the same block share one limit."""
+    import uuid
+    from multiprocessing import shared_memory
+
+    # Keep the lock file out of the real /tmp
+    monkeypatch.setattr(rate_limiter.tempfile, "gettempdir", lambda: str(tmp_path))
+    name = f"test-ratelimit-{uuid.uuid4().hex[:8]}"
+    first = RateLimitMiddleware(app=None, requests_limit=3, shared_memory_name=name)
+    second = RateLimitMiddleware(app=None, requests_limit=3, shared_memory_name=name)
+
+    try:
+        # The in-process table is never used alongside shared memory
+        assert first.buckets is None
+        assert first._is_rate_limited("ip:1.2.3.4") is False
+        assert second._is_rate_limited("ip:1.2.3.4") is False
+        assert first._is_rate_limited("ip:1.2.3.4") is False
+        assert second._is_rate_limited("ip:1.2.3.4") is True
+    finally:
+        first.shared_buckets.close()
+        second.shared_buckets.close()
+        shared_memory.SharedMemory(name=name).unlink()
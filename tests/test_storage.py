@@ -0,0 +1,120 @@
+import hashlib
+import io
+
+import pytest
+from cachetools import TTLCache
+
+from src.services.storage import StorageService, _HashingReader
+
+
+def test_hashing_reader_matches_sha256():
+    """Test that the checksum covers exactly the bytes read."""
+    content = b"%PDF-1.4 " + bytes(range(256)) * 100
+    reader = _HashingReader(io.BytesIO(content))
+
+    while reader.read(1000):
+        pass
+
+    assert reader.hexdigest() == hashlib.sha256(content).hexdigest()
+
+
+def test_hashing_reader_ignores_resent_chunks():
+    """Test that seeking back to retry a chunk doesn't hash it twice."""
+    content = b"0123456789" * 50
+    reader = _HashingReader(io.BytesIO(content))
+
+    reader.read(200)
+    reader.seek(100)  # retry from the middle of what was already read
+    while reader.read(150):
+        pass
+
+    assert reader.hexdigest() == hashlib.sha256(content).hexdigest()
+
+
+class StubBlob:
+    def __init__(self, bucket, path):
+        self.bucket = bucket
+        self.path = path
+
+    def generate_signed_url(self, version, expiration, method):
+        self.bucket.signed += 1
+        minutes = int(expiration.total_seconds() // 60)
+        return f"https://{self.bucket.name}/{self.path}?minutes={minutes}&n={self.bucket.signed}"
+
+
+class StubBucket:
+    """Just enough of storage.Bucket to sign URLs, counting every signature."""
+
+    def __init__(self, name):
+        self.name = name
+        self.signed = 0
+
+    def blob(self, path):
+        return StubBlob(self, path)
+
+
+@pytest.fixture
+def clock():
+    """Controllable timer for the signed URL cache."""
+    return [0.0]
+
+
+@pytest.fixture
+def storage_service(clock):
+    # Signing only needs the buckets and the cache, so skip __init__
+    # (it would need GCP credentials)
+    service = StorageService.__new__(StorageService)
+    service.images_bucket = StubBucket("images")
+    service.uploads_bucket = StubBucket("uploads")
+    service._signed_url_cache = TTLCache(
+        maxsize=100, ttl=StorageService.SIGNED_URL_CACHE_TTL, timer=lambda: clock[0]
+    )
+    return service
+
+
+async def test_signed_url_is_cached(storage_service):
+    """Test that a second request for the same URL doesn't sign again."""
+    first = await storage_service.generate_signed_url("user/doc/page_1.png")
+    second = await storage_service.generate_signed_url("user/doc/page_1.png")
+
+    assert first == second
+    assert storage_service.images_bucket.signed == 1
+
+
+async def test_signed_url_cache_key_includes_bucket_and_expiration(storage_service):
+    """Test that the same path in another bucket or with another expiry is signed separately."""
+    path = "user/doc/page_1.png"
+    urls = {
+        await storage_service.generate_signed_url(path),
+        await storage_service.generate_signed_url(path, bucket_type="uploads"),
+        await storage_service.generate_signed_url(path, expiration_minutes=120)
+    }
+
+    assert len(urls) == 3
+    assert storage_service.images_bucket.signed == 2
+    assert storage_service.uploads_bucket.signed == 1
+
+
+async def test_short_lived_signed_url_is_not_cached(storage_service):
+    """Test that URLs expiring before the cache TTL are always signed fresh."""
+    first = await storage_service.generate_signed_url("user/doc/page_1.png", expiration_minutes=30)
+    second = await storage_service.generate_signed_url("user/doc/page_1.png", expiration_minutes=30)
+
+    assert first != second
+    assert storage_service.images_bucket.signed == 2
+    assert len(storage_service._signed_url_cache) == 0
+
+
+async def test_cached_signed_url_has_at_least_30_minutes_left(storage_service, clock):
+    """Test that the documented minimum holds: a 1 hour URL is never served with under 30 minutes left."""
+    path = "user/doc/page_1.png"
+    first = await storage_service.generate_signed_url(path, expiration_minutes=60)
+
+    # The oldest a cached URL can be when it's handed out
+    clock[0] = StorageService.SIGNED_URL_CACHE_TTL - 1
+    assert await storage_service.generate_signed_url(path, expiration_minutes=60) == first
+    assert 60 * 60 - clock[0] >= 30 * 60
+
+    clock[0] = StorageService.SIGNED_URL_CACHE_TTL
+    assert await storage_service.generate_signed_url(path, expiration_minutes=60) != first
+    assert storage_service.images_bucket.signed == 2